@@ -0,0 +1,47 @@
+"""预编译预览合成用的alpha混合内核（numba AOT）
+
+生成的compose_aot扩展模块放在本目录，video_editor启动时优先导入，
+运行时不需要导入numba，也没有首次预览的JIT编译等待。
+内核源码在video_editor.py中，模块比本脚本或video_editor.py旧时才重新编译。
+numba.pycc已被numba弃用并在新版本中移除，需要requirements.txt中固定的numba版本。
+用法: python build_aot.py [--force]
+"""
+import glob
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def is_up_to_date():
+    """已生成的模块是否比内核源码（本脚本和video_editor.py）新"""
+    modules = glob.glob(os.path.join(HERE, "compose_aot*.pyd")) + glob.glob(os.path.join(HERE, "compose_aot*.so"))
+    if not modules:
+        return False
+    sources = [os.path.join(HERE, "build_aot.py"), os.path.join(HERE, "video_editor.py")]
+    return min(os.path.getmtime(path) for path in modules) >= max(os.path.getmtime(path) for path in sources)
+
+
+def build():
+    """编译compose_aot模块，numba不可用时跳过（预览会改用JIT编译或NumPy）"""
+    try:
+        from numba.pycc import CC
+    except ImportError:
+        print("未安装numba或当前numba版本已移除numba.pycc，跳过预编译")
+        return
+    from video_editor import _BLEND_SIGNATURE, _blend_planar_u8
+
+    cc = CC("compose_aot")
+    cc.output_dir = HERE
+    # 针对本机CPU生成代码（可使用AVX2等指令集），生成的模块只适合在本机使用
+    cc.target_cpu = "host"
+    cc.export("blend_planar_u8", _BLEND_SIGNATURE)(_blend_planar_u8)
+    cc.compile()
+    print(f"已生成预编译模块: {cc.output_dir}")
+
+
+if __name__ == "__main__":
+    if "--force" not in sys.argv[1:] and is_up_to_date():
+        print("预编译模块已是最新，无需重新编译")
+    else:
+        build()
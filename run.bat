@@ -13,8 +13,8 @@ if %errorlevel% neq 0 (
 
 :: 检查依赖是否已安装
 echo 正在检查依赖项...
-echo 尝试安装moviepy...
-pip install moviepy==1.0.3 -i https://pypi.tuna.tsinghua.edu.cn/simple
+echo 尝试安装imageio-ffmpeg（未配置系统FFmpeg时使用其自带的版本）...
+pip install imageio-ffmpeg==0.4.9 -i https://pypi.tuna.tsinghua.edu.cn/simple
 echo 尝试安装PyQt5...
 pip install PyQt5==5.15.9 -i https://pypi.tuna.tsinghua.edu.cn/simple
 echo 尝试安装NumPy...
@@ -23,6 +23,10 @@ echo 尝试安装Pillow...
 pip install Pillow==10.0.0 -i https://pypi.tuna.tsinghua.edu.cn/simple
 echo 尝试安装opencv-python...
 pip install opencv-python -i https://pypi.tuna.tsinghua.edu.cn/simple
+echo 尝试安装numba（可选，用于加速预览合成）...
+pip install numba==0.55.2 -i https://pypi.tuna.tsinghua.edu.cn/simple
+echo 检查预编译的预览合成内核（可选，需要已安装numba，内核代码更新后自动重新编译）...
+python build_aot.py
 
 :: 运行程序
 echo 正在启动程序...
@@ -0,0 +1,174 @@
+"""预览合成和导出相关函数的测试：定点除法、混合内核、ROI裁剪、局部重新合成、缓存、导出进度解析
+
+运行: python -m unittest discover tests
+"""
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_editor as ve  # noqa: E402
+
+
+def _random_header(rng, h, w, opaque=False):
+    """生成随机头部图片，返回与_scaled_entry相同格式的 (预乘BGR平面, 反alpha)"""
+    rgb = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    if opaque:
+        alpha = np.full((h, w), 255, np.uint8)
+    else:
+        alpha = rng.integers(0, 256, (h, w), dtype=np.uint8)
+    return ve._premultiply(rgb, alpha)
+
+
+class Div255Test(unittest.TestCase):
+    def test_exact_over_full_range(self):
+        t = np.arange(255 * 255 + 1, dtype=np.uint16)
+        expected = (2 * t.astype(np.int64) + 255) // 510  # round(t / 255)，255为奇数不会出现.5
+        np.testing.assert_array_equal(ve._div255(t), expected)
+
+
+class PremultiplyTest(unittest.TestCase):
+    def test_layout_and_values(self):
+        rng = np.random.default_rng(0)
+        rgb = rng.integers(0, 256, (5, 7, 3), dtype=np.uint8)
+        alpha = rng.integers(0, 256, (5, 7), dtype=np.uint8)
+        premul, inv_alpha = ve._premultiply(rgb, alpha)
+        self.assertEqual(premul.shape, (3, 5, 7))
+        self.assertTrue(premul.flags.c_contiguous)
+        expected = np.rint(rgb[:, :, ::-1].transpose(2, 0, 1) * (alpha / 255.0)).astype(np.uint8)
+        np.testing.assert_array_equal(premul, expected)
+        np.testing.assert_array_equal(inv_alpha, 255 - alpha)
+
+    def test_opaque_has_no_inverse_alpha(self):
+        premul, inv_alpha = _random_header(np.random.default_rng(1), 4, 6, opaque=True)
+        self.assertIsNone(inv_alpha)
+        self.assertTrue(premul.flags.c_contiguous)
+
+
+class AlphaBlitTest(unittest.TestCase):
+    def test_kernel_matches_numpy(self):
+        kernel = ve._get_blend_kernel()
+        if kernel is None:
+            self.skipTest("numba未安装，混合内核不可用")
+        rng = np.random.default_rng(2)
+        premul, inv_alpha = _random_header(rng, 40, 60)
+        frame = rng.integers(0, 256, (90, 120, 3), dtype=np.uint8)
+        expected = frame.copy()
+        ve._blend_numpy(expected, premul, inv_alpha, 11, 7, 45, 30, 5, 3)
+        kernel(frame, premul, inv_alpha, 7, 11, 3, 5, 30, 45)
+        np.testing.assert_array_equal(frame, expected)
+
+    def test_numpy_matches_float_blend(self):
+        rng = np.random.default_rng(3)
+        premul, inv_alpha = _random_header(rng, 20, 30)
+        frame = rng.integers(0, 256, (20, 30, 3), dtype=np.uint8)
+        expected = premul.transpose(1, 2, 0) + np.rint(frame * (inv_alpha[:, :, None] / 255.0)).astype(np.uint8)
+        ve._blend_numpy(frame, premul, inv_alpha, 0, 0, 30, 20)
+        np.testing.assert_array_equal(frame, expected)
+
+    def test_opaque_copy(self):
+        rng = np.random.default_rng(4)
+        premul, inv_alpha = _random_header(rng, 10, 12, opaque=True)
+        frame = np.zeros((30, 40, 3), np.uint8)
+        ve._alpha_blit(frame, premul, inv_alpha, 5, 6, 8, 4, 2, 3)
+        np.testing.assert_array_equal(frame[6:10, 5:13], premul[:, 3:7, 2:10].transpose(1, 2, 0))
+        self.assertEqual(frame.sum() - frame[6:10, 5:13].sum(), 0)
+
+
+class FitRoiTest(unittest.TestCase):
+    def test_inside(self):
+        self.assertEqual(ve._fit_roi(10, 20, 30, 40, 100, 100), (10, 20, 30, 40))
+
+    def test_clipped_at_right_and_bottom(self):
+        self.assertEqual(ve._fit_roi(80, 90, 30, 40, 100, 100), (80, 90, 20, 10))
+
+    def test_negative_position_clamped_to_zero(self):
+        self.assertEqual(ve._fit_roi(-5, -8, 30, 40, 100, 100), (0, 0, 30, 40))
+
+    def test_completely_outside(self):
+        x, y, w, h = ve._fit_roi(120, 10, 30, 40, 100, 100)
+        self.assertEqual(w, 0)
+
+
+class ComposeRegionTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.size = (160, 90)
+        self.base = rng.integers(0, 256, (90, 160, 3), dtype=np.uint8)
+        self.images = [_random_header(rng, 20, 50), _random_header(rng, 15, 40, opaque=True)]
+        factor = rng.integers(0, 256, (60, 100, 3)).astype(np.uint16)
+        self.watermark = ("bg", factor, 30, 20)
+
+    def headers(self, positions):
+        layers = []
+        for number, ((premul, inv_alpha), (x, y)) in enumerate(zip(self.images, positions)):
+            x, y, w, h = ve._fit_roi(x, y, premul.shape[2], premul.shape[1], *self.size)
+            layers.append((number, premul, inv_alpha, x, y, w, h))
+        return layers
+
+    def compose_full(self, positions):
+        processor = ve.VideoProcessor([], 0)
+        processor._base_frame = self.base
+        processor.preview_buf = np.empty_like(self.base)
+        processor.compose_region((0, 0) + self.size, self.headers(positions), self.watermark)
+        return processor
+
+    def test_partial_recomposite_matches_full(self):
+        old_positions = [(5, 4), (100, 60)]
+        new_positions = [(40, 30), (130, 80)]
+        processor = self.compose_full(old_positions)
+        old_headers, new_headers = self.headers(old_positions), self.headers(new_positions)
+        # 与process_preview相同：只重新合成位置变化的图片的新旧区域
+        for old, new in zip(old_headers, new_headers):
+            for rect in (old[3:], new[3:]):
+                if rect[2] > 0 and rect[3] > 0:
+                    processor.compose_region(rect, new_headers, self.watermark)
+        expected = self.compose_full(new_positions).preview_buf
+        np.testing.assert_array_equal(processor.preview_buf, expected)
+
+
+class LruCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = ve.collections.OrderedDict()
+        for key in "abc":
+            ve._lru_put(cache, key, key.upper(), maxsize=2)
+        self.assertIsNone(ve._lru_get(cache, "a"))
+        self.assertEqual(ve._lru_get(cache, "b"), "B")
+        ve._lru_put(cache, "d", "D", maxsize=2)
+        self.assertEqual(list(cache), ["b", "d"])
+
+
+class EncodeProgressTest(unittest.TestCase):
+    """用Python子进程模拟FFmpeg的 -progress 输出"""
+
+    def run_script(self, script, stop_event=None, duration=10.0):
+        progress = []
+        command = [sys.executable, "-c", script]
+        result = ve._encode_one(command, stop_event or threading.Event(), duration, progress.append)
+        return result, progress
+
+    def test_progress_fractions(self):
+        script = "print('frame=1'); print('out_time_us=2500000'); print('out_time_us=N/A'); print('out_time_us=20000000')"
+        result, progress = self.run_script(script)
+        self.assertTrue(result)
+        self.assertEqual(progress, [0.25, 1.0])
+
+    def test_error_message_from_output_tail(self):
+        script = "import sys; print('out_time_us=1000000'); print('Invalid argument'); sys.exit(1)"
+        with self.assertRaisesRegex(RuntimeError, "Invalid argument"):
+            self.run_script(script)
+
+    def test_stopped_before_start(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        result, progress = self.run_script("print('out_time_us=1000000')", stop_event)
+        self.assertFalse(result)
+        self.assertEqual(progress, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,19 +4,376 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel, QVB
                              QWidget, QFileDialog, QLineEdit, QListWidget, QMessageBox, QProgressBar, 
                              QComboBox, QSpinBox, QCheckBox, QFrame, QGroupBox, QDoubleSpinBox, QTextEdit,
                              QGridLayout)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QDateTime
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot, QSize, QTimer, QMutex, QWaitCondition
 from PyQt5.QtGui import QPixmap, QImage, QIcon
 import numpy as np
-from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip, ColorClip, clips_array, vfx
-# 导入moviepy的vfx模块
 import tempfile
-import cv2
-from PIL import Image
 import time
 import threading
 import traceback
 import subprocess
 import shutil
+import functools
+import collections
+import concurrent.futures
+
+# cv2、PIL、numba均在首次使用时才导入，缩短程序启动时间
+# numba未安装时内核以纯Python形式存在但不会被调用
+_blend_kernel = None
+_blend_kernel_lock = threading.Lock()
+
+# 混合内核的显式签名（JIT编译和build_aot.py预编译共用），要求所有数组C连续
+# premul为平面格式 (3, H, W)，每个通道平面连续存放
+_BLEND_SIGNATURE = "void(u1[:, :, ::1], u1[:, :, ::1], u1[:, ::1], i8, i8, i8, i8, i8, i8)"
+
+
+def _blend_planar_u8(dst, premul, inv_a, y, x, src_y, src_x, h, w):
+    """alpha混合内核：一次遍历完成乘加和除以255
+    
+    图片数据按通道分平面存放，内层循环对premul和inv_a都是连续读取，便于向量化。
+    头部图片区域很小，单线程执行比多线程并行更快（并行的线程调度开销超过计算本身）
+    """
+    for i in range(h):
+        dst_row = dst[y + i]
+        p0 = premul[0, src_y + i]
+        p1 = premul[1, src_y + i]
+        p2 = premul[2, src_y + i]
+        inv_a_row = inv_a[src_y + i]
+        for j in range(w):
+            ia = inv_a_row[src_x + j]
+            t0 = dst_row[x + j, 0] * ia + 128
+            t1 = dst_row[x + j, 1] * ia + 128
+            t2 = dst_row[x + j, 2] * ia + 128
+            dst_row[x + j, 0] = p0[src_x + j] + ((t0 + (t0 >> 8)) >> 8)
+            dst_row[x + j, 1] = p1[src_x + j] + ((t1 + (t1 >> 8)) >> 8)
+            dst_row[x + j, 2] = p2[src_x + j] + ((t2 + (t2 >> 8)) >> 8)
+
+
+def _get_blend_kernel():
+    """首次调用时加载混合内核，依次尝试build_aot.py预编译的模块、numba JIT编译，都不可用时返回None"""
+    global _blend_kernel
+    with _blend_kernel_lock:
+        if _blend_kernel is None:
+            try:
+                # 预编译模块不需要导入numba，也没有JIT编译开销（单线程执行）
+                # 旧版本生成的模块没有平面格式内核，导入失败后改用JIT
+                from compose_aot import blend_planar_u8
+                _blend_kernel = blend_planar_u8
+            except ImportError:
+                try:
+                    import numba
+                except ImportError:
+                    _blend_kernel = False
+                else:
+                    # 内层循环无分支，便于LLVM自动向量化
+                    _blend_kernel = numba.njit(_BLEND_SIGNATURE, fastmath=True, cache=True,
+                                               boundscheck=False)(_blend_planar_u8)
+        return _blend_kernel or None
+
+
+def _warm_up_blend_kernel():
+    """预先加载混合内核并校验一次，避免首次预览时等待JIT编译或加载缓存
+    
+    用与预览相同的方式（_premultiply）生成一张半透明小图，分别经内核和NumPy混合，
+    内核报错或结果不一致（如数组布局不符、预编译模块过旧）时停用内核并返回说明，正常时返回None
+    """
+    global _blend_kernel
+    kernel = _get_blend_kernel()
+    if kernel is None:
+        return None
+    rgb = (np.arange(4 * 6 * 3, dtype=np.uint8) * 3).reshape(4, 6, 3)
+    alpha = np.linspace(0, 255, 4 * 6).astype(np.uint8).reshape(4, 6)
+    premul, inv_alpha = _premultiply(rgb, alpha)
+    frame = np.full((6, 8, 3), 200, np.uint8)
+    expected = frame.copy()
+    _blend_numpy(expected, premul, inv_alpha, 1, 1, 5, 3, 1, 1)
+    try:
+        kernel(frame, premul, inv_alpha, 1, 1, 1, 1, 3, 5)
+        ok = np.array_equal(frame, expected)
+    except Exception:
+        ok = False
+    if ok:
+        return None
+    with _blend_kernel_lock:
+        _blend_kernel = False
+    return "混合内核校验失败，预览改用NumPy合成（预编译模块可能已过旧，可删除compose_aot后重新运行build_aot.py）"
+
+
+def _configure_opencv():
+    """导入并配置OpenCV：启用优化代码路径，线程数取CPU核数的一半给FFmpeg导出留出余量，返回SIMD指令集说明"""
+    import cv2
+    cv2.setUseOptimized(True)
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // 2))
+    baseline = dispatched = ""
+    for line in cv2.getBuildInformation().splitlines():
+        key, _, value = line.strip().partition(":")
+        if key == "Baseline":
+            baseline = value.strip()
+        elif key == "Dispatched code generation":
+            dispatched = value.strip()
+    info = f"OpenCV {cv2.__version__}: 基础指令集 [{baseline or '未知'}]，运行时分派 [{dispatched or '无'}]"
+    features = f"{baseline} {dispatched}".split()
+    if "AVX2" not in features and "NEON" not in features:
+        info += "；当前OpenCV未启用AVX2/NEON优化，建议安装支持AVX2的opencv-python版本"
+    # 只检测并显示OpenCL设备；是否启用由预览线程自己设置（OpenCV按线程保存该开关）
+    if cv2.ocl.haveOpenCL():
+        info += f"；OpenCL加速: {cv2.ocl.Device.getDefault().name()}"
+    return info
+
+
+def _div255(t):
+    """uint16定点下计算 round(t / 255)，用移位代替整数除法（要求 t <= 255*255）"""
+    t = t + 128
+    return (t + (t >> 8)) >> 8
+
+
+def _premultiply(rgb, alpha):
+    """计算预览用的预乘图片：返回 (C连续的预乘BGR平面 (3, H, W), 255-alpha)，图片完全不透明时反alpha为None"""
+    bgr_planes = rgb[:, :, ::-1].transpose(2, 0, 1)
+    if alpha.min() == 255:
+        return np.ascontiguousarray(bgr_planes), None
+    # 转置后的视图不连续，运算结果会沿用其内存布局，必须转为C连续（混合内核要求）
+    premul = np.ascontiguousarray(_div255(bgr_planes * alpha.astype(np.uint16)).astype(np.uint8))
+    return premul, 255 - alpha
+
+
+def _blend_numpy(dst, premul, inv_a, x, y, w, h, src_x=0, src_y=0):
+    """_alpha_blit的NumPy实现（混合内核不可用时使用）"""
+    src = (slice(src_y, src_y + h), slice(src_x, src_x + w))
+    roi = dst[y:y+h, x:x+w]
+    roi[:] = (premul[(slice(None),) + src].transpose(1, 2, 0) +
+              _div255(np.multiply(roi, inv_a[src][:, :, None], dtype=np.uint16)).astype(np.uint8))
+
+
+def _alpha_blit(dst, premul, inv_a, x, y, w, h, src_x=0, src_y=0):
+    """将图片(src_x, src_y)起的w×h区域按alpha混合到目标帧(x, y)处（uint16定点运算，无浮点，原地修改dst）
+    
+    premul为预乘alpha后的BGR平面 (3, H, W)（rgb*a/255，uint8），inv_a为255-a（uint8），
+    混合公式为 dst = premul + dst*(255-a)/255；inv_a为None表示图片完全不透明，直接复制
+    """
+    if inv_a is None:
+        dst[y:y+h, x:x+w] = premul[:, src_y:src_y+h, src_x:src_x+w].transpose(1, 2, 0)
+        return
+    kernel = _get_blend_kernel()
+    if kernel is not None:
+        kernel(dst, premul, inv_a, y, x, src_y, src_x, h, w)
+        return
+    _blend_numpy(dst, premul, inv_a, x, y, w, h, src_x, src_y)
+
+
+def _fit_roi(x, y, img_w, img_h, frame_w, frame_h):
+    """将图片放置区域限制在帧内，返回 (x, y, w, h)，完全超出时w或h为0"""
+    x = max(0, x)
+    y = max(0, y)
+    w = max(0, min(img_w, frame_w - x))
+    h = max(0, min(img_h, frame_h - y))
+    return x, y, w, h
+
+
+def _shift_down(frame, offset, out=None):
+    """将帧下移offset像素，顶部补黑、底部裁掉
+    
+    提供out时直接写入out（不分配内存），否则只分配一次内存
+    """
+    if out is None:
+        black = np.zeros((offset,) + frame.shape[1:], dtype=np.uint8)
+        return np.concatenate((black, frame[:frame.shape[0] - offset]), axis=0)
+    out[:offset] = 0
+    out[offset:] = frame[:frame.shape[0] - offset]
+    return out
+
+
+def _alpha_over(dst_rgba, src_rgba, x, y):
+    """将RGBA图片以over方式合成到RGBA画布(x, y)处（超出画布的部分被裁剪）"""
+    h = min(src_rgba.shape[0], dst_rgba.shape[0] - y)
+    w = min(src_rgba.shape[1], dst_rgba.shape[1] - x)
+    if h <= 0 or w <= 0:
+        return
+    roi = dst_rgba[y:y+h, x:x+w]
+    src = src_rgba[:h, :w].astype(np.float32) / 255.0
+    dst = roi.astype(np.float32) / 255.0
+    src_a = src[:, :, 3:4]
+    dst_a = dst[:, :, 3:4] * (1 - src_a)
+    out_a = src_a + dst_a
+    out_rgb = (src[:, :, :3] * src_a + dst[:, :, :3] * dst_a) / np.maximum(out_a, 1e-6)
+    roi[:, :, :3] = np.clip(out_rgb * 255 + 0.5, 0, 255).astype(np.uint8)
+    roi[:, :, 3:4] = np.clip(out_a * 255 + 0.5, 0, 255).astype(np.uint8)
+
+
+# 预览帧像素数达到该值（1080p）时才使用OpenCL缩放，较小的帧上传到GPU的开销超过收益
+_OPENCL_MIN_PIXELS = 1920 * 1080
+
+# 预览显示缓冲区使用4字节对齐的像素（alpha恒为255，预乘与否结果相同）：
+# 小端机器上BGRA字节序就是Qt的ARGB32格式，转换为QPixmap时无需再做格式转换
+_DISPLAY_BGRA = sys.byteorder == "little"
+_DISPLAY_QIMAGE_FORMAT = QImage.Format_ARGB32_Premultiplied if _DISPLAY_BGRA else QImage.Format_RGBA8888_Premultiplied
+
+
+# 预览帧和图片缓存的容量（按最近使用淘汰），预览线程和导出线程共用一把锁
+_CACHE_SIZE = 8
+_cache_lock = threading.Lock()
+
+
+def _lru_get(cache, key):
+    """从OrderedDict缓存中取值并标记为最近使用，未命中时返回None"""
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache, key, value, maxsize=_CACHE_SIZE):
+    """写入OrderedDict缓存，超出容量时淘汰最久未使用的条目"""
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
+
+
+def _ffmpeg_binary():
+    """查找FFmpeg可执行文件：优先使用PATH中的ffmpeg，否则使用imageio-ffmpeg自带的版本"""
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+# 可选的H.264编码器：(界面显示名称, FFmpeg编码器名称)
+VIDEO_ENCODERS = (
+    ("CPU x264", "libx264"),
+    ("NVENC", "h264_nvenc"),
+    ("QSV", "h264_qsv"),
+    ("VAAPI", "h264_vaapi"),
+    ("VideoToolbox", "h264_videotoolbox"),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _detect_video_encoders():
+    """检测当前FFmpeg编译进的H.264编码器，返回可用的编码器名称列表（结果缓存）"""
+    available = ["libx264"]
+    try:
+        result = subprocess.run([_ffmpeg_binary(), "-hide_banner", "-encoders"],
+                                stdin=subprocess.DEVNULL, capture_output=True, timeout=10)
+        output = result.stdout.decode("utf-8", errors="replace")
+    except Exception:
+        return available
+    for _, encoder in VIDEO_ENCODERS[1:]:
+        if f" {encoder} " in output:
+            available.append(encoder)
+    return available
+
+
+def _probe_encoder(encoder):
+    """用编码器实际编码一帧测试画面，检查显卡和驱动是否可用（编译进FFmpeg不代表能用）"""
+    global_args, output_filter, codec_args = _encoder_args(encoder, threads=1)
+    command = ([_ffmpeg_binary(), "-hide_banner", "-loglevel", "error"] + global_args +
+               ["-f", "lavfi", "-i", "color=c=black:s=256x256:r=25", "-frames:v", "1",
+                "-vf", output_filter] + codec_args + ["-f", "null", "-"])
+    try:
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, timeout=15)
+    except Exception:
+        return False
+    return result.returncode == 0
+
+
+@functools.lru_cache(maxsize=None)
+def _usable_video_encoders():
+    """返回实际能编码的H.264编码器名称列表（按VIDEO_ENCODERS顺序，结果缓存）
+    
+    对FFmpeg编译进的每个硬件编码器并行试编码一帧，libx264总是可用
+    """
+    hardware = _detect_video_encoders()[1:]
+    if not hardware:
+        return ["libx264"]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(hardware)) as executor:
+        usable = list(executor.map(_probe_encoder, hardware))
+    return ["libx264"] + [encoder for encoder, ok in zip(hardware, usable) if ok]
+
+
+def _encoder_args(encoder, threads=4):
+    """返回编码器对应的 (输入前参数, 滤镜图末尾的像素格式滤镜, 输出参数)"""
+    if encoder == "h264_nvenc":
+        return [], "format=yuv420p", ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23"]
+    if encoder == "h264_qsv":
+        return [], "format=nv12", ["-c:v", "h264_qsv", "-preset", "medium", "-global_quality", "23"]
+    if encoder == "h264_vaapi":
+        # 滤镜在CPU上完成，最后上传到GPU交给VAAPI编码
+        return (["-vaapi_device", "/dev/dri/renderD128"], "format=nv12,hwupload",
+                ["-c:v", "h264_vaapi", "-qp", "23"])
+    if encoder == "h264_videotoolbox":
+        return [], "format=yuv420p", ["-c:v", "h264_videotoolbox", "-b:v", "8M"]
+    return [], "format=yuv420p", ["-c:v", "libx264", "-preset", "medium", "-threads", str(threads)]
+
+
+def _encode_one(command, stop_event, duration=0.0, on_progress=None):
+    """运行一个视频的FFmpeg编码命令（在线程池中执行），stop_event被设置时终止进程并返回False
+    
+    命令带有 -progress pipe:1，stderr合并到stdout一起读取：进度行按已输出时长/视频时长回调
+    on_progress(0~1)，其余行保留最后若干行作为出错时的错误信息
+    """
+    # 线程池中排队的任务在停止后才开始时直接返回，不再启动FFmpeg
+    if stop_event.is_set():
+        return False
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    
+    def watch_stop():
+        # FFmpeg长时间没有输出时读取会一直阻塞，由监视线程定时检查停止标志并终止进程
+        while process.poll() is None:
+            if stop_event.wait(0.2):
+                process.kill()
+                return
+    
+    watcher = threading.Thread(target=watch_stop, daemon=True)
+    watcher.start()
+    tail = collections.deque(maxlen=20)
+    with process.stdout:
+        for raw_line in process.stdout:
+            if stop_event.is_set():
+                break
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            key, sep, value = line.partition("=")
+            if not sep or " " in line:
+                tail.append(line)
+            elif key == "out_time_us" and on_progress is not None and duration > 0 and value.isdigit():
+                on_progress(min(1.0, int(value) / 1e6 / duration))
+    process.wait()
+    watcher.join()
+    if stop_event.is_set():
+        return False
+    
+    if process.returncode != 0:
+        message = "\n".join(tail)
+        raise RuntimeError(f"FFmpeg退出码 {process.returncode}: {message[-500:]}")
+    return True
+
+
+def _file_mtime(path):
+    """返回文件修改时间，路径为空或文件不存在时返回None（一次stat同时完成存在性检查）"""
+    if not path:
+        return None
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _probe_video(video_path):
+    """读取视频宽高和时长（秒，无法获取时为0）"""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"无法打开视频文件: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps if fps > 0 else 0.0
+        return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), duration
+    finally:
+        cap.release()
+
 
 class VideoProcessor(QThread):
     """视频处理线程"""
@@ -24,14 +381,23 @@ class VideoProcessor(QThread):
     # 定义信号
     progress_updated = pyqtSignal(int)
     processing_finished = pyqtSignal(str)
-    preview_frame_ready = pyqtSignal(np.ndarray)
+    preview_frame_ready = pyqtSignal()  # 显示缓冲区已更新，通过snapshot()读取（完整帧写入preview_buf）
+    preview_refined = pyqtSignal()  # 同一帧已用高质量插值重新缩放到显示缓冲区
     error_occurred = pyqtSignal(str)
     
+    # 快速预览后空闲多久（毫秒）再以高质量插值重新缩放
+    SMOOTH_PREVIEW_DELAY_MS = 250
+    
+    # 预览帧和头部图片缓存（类属性，在每次预览新建的处理线程之间共享，按最近使用淘汰）
+    _frame_cache = collections.OrderedDict()   # (视频路径, 修改时间) -> 解码后的BGR帧
+    _img_cache = collections.OrderedDict()     # (路径, 修改时间) -> (原始RGB, 原始alpha)
+    _scaled_cache = collections.OrderedDict()  # (路径, 修改时间, 目标宽度) -> (缩放后的RGB, alpha, 预乘BGR, 255-alpha)
+    
     def __init__(self, video_files, offset, 
                  header_img1_path=None, header_img1_x=0, header_img1_y=0, header_img1_scale=0.1,
                  header_img2_path=None, header_img2_x=0, header_img2_y=30, header_img2_scale=0.1,
                  bg_img_path=None, bg_img_x=0, bg_img_y=0, bg_img_scale=1.0, bg_img_opacity=0.8,
-                 preview_only=True, output_dir=None):
+                 preview_only=True, output_dir=None, encoder="libx264", preview_size=None):
         """初始化处理器
         
         Args:
@@ -50,8 +416,10 @@ class VideoProcessor(QThread):
             bg_img_y: 背景图片Y坐标
             bg_img_scale: 背景图片缩放比例
             bg_img_opacity: 背景图片透明度
-            preview_only: 是否仅生成预览
+            preview_only: 是否为预览线程（常驻运行，通过submit_params提交预览请求）
             output_dir: 输出目录
+            encoder: 导出使用的FFmpeg视频编码器
+            preview_size: 预览区域尺寸 (宽, 高)，预览图像在工作线程中缩放到该尺寸以内
         """
         super().__init__()
         
@@ -79,14 +447,83 @@ class VideoProcessor(QThread):
 
         self.preview_only = preview_only
         self.output_dir = output_dir
+        self.encoder = encoder
+        self.preview_size = preview_size
+        self.preview_buf = None  # 预览帧缓冲区（BGR uint8），多次预览复用，视频尺寸变化时重新分配
+        
+        # 预览的局部重新合成状态：下移后的原始帧、正片叠底系数、上次合成的图层内容和位置
+        self._base_frame = None
+        self._base_src = None
+        self._base_offset = None
+        self._watermark = None
+        self._composed = None
+        self._capture = None  # 预览复用的视频: ((路径, 修改时间), VideoCapture, 定位时间ms)
+        
+        # 缩放到预览区域尺寸的4字节像素显示缓冲区，预览线程写入、界面线程通过snapshot()读取
+        self._display_buf = None
+        self._scaled_bgr = None  # 缩放结果的中间缓冲区（BGR）
+        self._display_fast = False  # 显示缓冲区当前是否为快速插值的结果
+        self._display_mutex = QMutex()
         
         self._stop_event = threading.Event()
+        
+        # 预览请求槽：只保留最新一次提交的参数，预览线程空闲时在条件变量上等待
+        self._request_mutex = QMutex()
+        self._request_cond = QWaitCondition()
+        self._pending_params = None
+    
+    @classmethod
+    def _load_image(cls, path, mtime=None):
+        """读取图片并拆分为连续存储的 (RGB数组, alpha数组)，按 (路径, 修改时间) 缓存
+        
+        调用方已取得修改时间时通过mtime传入，省去重复的stat
+        """
+        key = (path, os.path.getmtime(path) if mtime is None else mtime)
+        entry = _lru_get(cls._img_cache, key)
+        if entry is None:
+            from PIL import Image
+            img_array = np.array(Image.open(path).convert("RGBA"))
+            entry = (np.ascontiguousarray(img_array[:, :, :3]), np.ascontiguousarray(img_array[:, :, 3]))
+            _lru_put(cls._img_cache, key, entry)
+        return entry
+    
+    @classmethod
+    def _scaled_entry(cls, path, target_width, mtime=None):
+        """返回缩放到指定宽度（保持宽高比）的 (RGB, alpha, 预乘BGR, 255-alpha)
+        
+        RGB和alpha分开缩放：RGB注重画质，alpha用线性插值即可。
+        预乘结果只用于预览，直接按OpenCV解码帧的BGR顺序分通道平面存储（(3, H, W)，uint8），
+        与反alpha（uint8）一样在缩放比例不变时是常量，随缩放结果一起按 (路径, 修改时间, 宽度) 缓存。
+        图片完全不透明时反alpha为None，预览时直接复制像素
+        """
+        if mtime is None:
+            mtime = os.path.getmtime(path)
+        key = (path, mtime, target_width)
+        entry = _lru_get(cls._scaled_cache, key)
+        if entry is None:
+            import cv2
+            rgb, alpha = cls._load_image(path, mtime)
+            target_height = max(1, int(round(rgb.shape[0] * target_width / rgb.shape[1])))
+            # RGB缩小用INTER_AREA（质量和速度最好），放大用INTER_CUBIC
+            interpolation = cv2.INTER_AREA if target_width < rgb.shape[1] else cv2.INTER_CUBIC
+            rgb = cv2.resize(rgb, (target_width, target_height), interpolation=interpolation)
+            alpha = cv2.resize(alpha, (target_width, target_height), interpolation=cv2.INTER_LINEAR)
+            premul, inv_alpha = _premultiply(rgb, alpha)
+            entry = (rgb, alpha, premul, inv_alpha)
+            _lru_put(cls._scaled_cache, key, entry)
+        return entry
+    
+    @classmethod
+    def _scaled_rgba(cls, path, target_width):
+        """返回缩放到指定宽度（保持宽高比）的RGBA数组（用于导出时合成图层）"""
+        rgb, alpha = cls._scaled_entry(path, target_width)[:2]
+        return np.dstack((rgb, alpha))
     
     def run(self):
         """运行线程"""
         try:
             if self.preview_only:
-                self.process_preview()
+                self.preview_loop()
             else:
                 self.process_videos()
         except Exception as e:
@@ -96,13 +533,124 @@ class VideoProcessor(QThread):
     def stop(self):
         """停止线程"""
         self._stop_event.set()
+        # 唤醒正在等待预览请求的线程，使其退出
+        self._request_mutex.lock()
+        self._request_cond.wakeAll()
+        self._request_mutex.unlock()
     
     def stopped(self):
         """检查线程是否已停止"""
         return self._stop_event.is_set()
     
+    @pyqtSlot(dict)
+    def submit_params(self, params):
+        """提交预览请求（键为构造参数名），替换尚未处理的请求并唤醒预览线程"""
+        self._request_mutex.lock()
+        self._pending_params = params
+        self._request_cond.wakeOne()
+        self._request_mutex.unlock()
+    
+    def preview_cancelled(self):
+        """当前预览是否已过时（线程停止或已有更新的预览请求）"""
+        if self.stopped():
+            return True
+        self._request_mutex.lock()
+        try:
+            return self._pending_params is not None
+        finally:
+            self._request_mutex.unlock()
+    
+    def preview_loop(self):
+        """预览线程主循环：等待预览请求，每次取最新的参数生成一帧预览"""
+        import cv2
+        # OpenCV的OpenCL开关是线程局部的，必须在预览线程中设置：
+        # 有可用的OpenCL设备时，大尺寸预览帧的缩放交给GPU（T-API），出错时在update_display_buffer中关闭
+        cv2.ocl.setUseOpenCL(cv2.ocl.haveOpenCL())
+        try:
+            self._serve_previews()
+        finally:
+            self.release_capture()
+    
+    def _serve_previews(self):
+        """等待并处理预览请求，直到线程被停止
+        
+        预览先用快速插值缩放显示，之后一段时间没有新的请求时再用高质量插值重新缩放一次
+        """
+        while True:
+            refine = self._display_fast and self._composed is not None
+            self._request_mutex.lock()
+            try:
+                while self._pending_params is None and not self.stopped():
+                    if not refine:
+                        self._request_cond.wait(self._request_mutex)
+                    elif not self._request_cond.wait(self._request_mutex, self.SMOOTH_PREVIEW_DELAY_MS):
+                        break
+                if self.stopped():
+                    return
+                params = self._pending_params
+                self._pending_params = None
+            finally:
+                self._request_mutex.unlock()
+            
+            if params is None:
+                # 空闲超时：预览缓冲区中的完整帧未变，以高质量插值重新缩放
+                self.update_display_buffer(self.preview_buf, smooth=True)
+                self.preview_refined.emit()
+                continue
+            
+            for name, value in params.items():
+                setattr(self, name, value)
+            self.process_preview()
+    
+    def read_preview_frame(self, video_path):
+        """解码预览用的一帧（BGR），按 (路径, 修改时间) 缓存，失败时返回None"""
+        import cv2
+        key = (video_path, os.path.getmtime(video_path))
+        frame = _lru_get(self._frame_cache, key)
+        if frame is not None:
+            return frame
+        
+        # 复用上次打开的视频（帧缓存淘汰后重新预览同一视频时无需重新打开容器）
+        if self._capture is None or self._capture[0] != key:
+            self.release_capture()
+            # 使用OpenCV打开视频，只定位并解码一帧
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                cap.release()
+                self.error_occurred.emit(f"无法打开视频文件: {video_path}")
+                return None
+            # 获取第1秒的帧（视频过短时取中间帧）
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            duration_ms = 1000 * cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps if fps > 0 else 0
+            self._capture = (key, cap, min(1000, duration_ms / 2))
+        _, cap, position_ms = self._capture
+        
+        # 按时间定位（从最近的关键帧解码到目标位置），grab只解码，retrieve时才转换出图像
+        cap.set(cv2.CAP_PROP_POS_MSEC, position_ms)
+        ok = cap.grab()
+        if ok:
+            # 解码帧保持BGR顺序，由界面以BGR888格式直接显示，省去一次整帧颜色转换
+            ok, frame = cap.retrieve()
+        
+        if not ok:
+            self.error_occurred.emit(f"无法读取视频帧: {os.path.basename(video_path)}")
+            return None
+        # 缓存的帧只读，合成都写入预览缓冲区
+        frame.flags.writeable = False
+        _lru_put(self._frame_cache, key, frame)
+        return frame
+    
+    def release_capture(self):
+        """关闭预览复用的视频"""
+        if self._capture is not None:
+            self._capture[1].release()
+            self._capture = None
+    
     def process_preview(self):
-        """处理预览帧"""
+        """处理预览帧
+        
+        只有头部图片位置变化时，从缓存的下移帧恢复新旧位置所在的区域并局部重新合成，不重建整帧
+        """
         try:
             if not self.video_files:
                 self.error_occurred.emit("没有选择视频文件")
@@ -111,200 +659,233 @@ class VideoProcessor(QThread):
             # 仅处理第一个视频文件
             video_path = self.video_files[0]
             
-            # 使用moviepy打开视频
-            try:
-                video_clip = VideoFileClip(video_path)
-                self.error_occurred.emit(f"已加载视频: {os.path.basename(video_path)}")
-                self.error_occurred.emit(f"视频尺寸: {video_clip.size}")
-            except Exception as e:
-                self.error_occurred.emit(f"无法打开视频文件: {str(e)}")
+            # 解码预览帧（按视频文件缓存，调整图片参数时无需重新打开和解码视频）
+            frame = self.read_preview_frame(video_path)
+            if frame is None:
+                return
+            video_height, video_width = frame.shape[:2]
+            self.error_occurred.emit(f"已加载视频: {os.path.basename(video_path)}")
+            self.error_occurred.emit(f"视频尺寸: [{video_width}, {video_height}]")
+            if self.preview_cancelled():
+                # 解码期间已被新的预览请求取代
                 return
             
-            # 获取视频尺寸
-            video_width, video_height = video_clip.size
-            
-            # 获取第1秒的帧
-            frame_time = min(1, video_clip.duration / 2)
-            frame = video_clip.get_frame(frame_time)
-            
-            # 创建黑色背景
-            background = np.zeros((video_height, video_width, 3), dtype=np.uint8)
-            
-            # 将原始视频下移
+            # 将原始视频下移（不含叠加层），视频和下移距离不变时复用
             offset = min(self.offset, video_height - 10)  # 确保至少有一部分视频可见
-            moved_frame = np.zeros_like(background)
-            moved_frame[offset:, :] = frame[:video_height-offset, :]
-            
-            # 尝试加载并缩放第一张头部图片
-            try:
-                if self.header_img1_path and os.path.exists(self.header_img1_path):
-                    header_img1 = ImageClip(self.header_img1_path)
-                    # 计算缩放后的尺寸，保持宽高比
-                    original_width, original_height = header_img1.size
-                    scale_factor = original_width / video_width
-                    target_height = int(original_height / scale_factor * self.header_img1_scale)
-                    
-                    # 根据缩放比例调整图片大小
-                    header_img1 = header_img1.resize(width=video_width * self.header_img1_scale)
-                    
-                    # 创建图片遮罩
-                    img1_array = header_img1.get_frame(0)
-                    # 计算放置位置
-                    x_pos = int(self.header_img1_x)
-                    y_pos = int(self.header_img1_y)
-                    
-                    # 确保图片不会超出边界
-                    img_h, img_w = img1_array.shape[:2]
-                    if x_pos < 0: x_pos = 0
-                    if y_pos < 0: y_pos = 0
-                    if x_pos + img_w > video_width: img_w = video_width - x_pos
-                    if y_pos + img_h > video_height: img_h = video_height - y_pos
-                    
-                    # 将图片叠加到帧上
-                    if img_w > 0 and img_h > 0:
-                        # 重新缩放图片确保尺寸正确
-                        img1_resized = cv2.resize(img1_array, (img_w, img_h))
-                        # 仅复制非透明区域
-                        if img1_resized.shape[2] == 4:  # 如果有alpha通道
-                            alpha = img1_resized[:, :, 3] / 255.0
-                            for c in range(3):
-                                moved_frame[y_pos:y_pos+img_h, x_pos:x_pos+img_w, c] = (
-                                    moved_frame[y_pos:y_pos+img_h, x_pos:x_pos+img_w, c] * (1 - alpha) + 
-                                    img1_resized[:, :, c] * alpha
-                                )
-                        else:
-                            moved_frame[y_pos:y_pos+img_h, x_pos:x_pos+img_w] = img1_resized[:, :, :3]
-                    
-                    self.error_occurred.emit(f"加载图片1成功: {os.path.basename(self.header_img1_path)}")
-                    self.error_occurred.emit(f"图片1尺寸: 原始={header_img1.size}, 缩放比例={self.header_img1_scale}, 调整后宽度={img_w}, 位置=({x_pos}, {y_pos})")
-            except Exception as e:
-                self.error_occurred.emit(f"处理图片1时出错: {str(e)}")
+            if frame is not self._base_src or offset != self._base_offset:
+                self._base_frame = _shift_down(frame, offset)
+                self._base_src = frame
+                self._base_offset = offset
+                self._composed = None
+            if self.preview_buf is None or self.preview_buf.shape != frame.shape:
+                self.preview_buf = np.empty(frame.shape, dtype=np.uint8)
+                self._composed = None
             
-            # 尝试加载并缩放第二张头部图片
-            try:
-                if self.header_img2_path and os.path.exists(self.header_img2_path):
-                    header_img2 = ImageClip(self.header_img2_path)
-                    # 计算缩放后的尺寸，保持宽高比
-                    original_width, original_height = header_img2.size
-                    scale_factor = original_width / video_width
-                    target_height = int(original_height / scale_factor * self.header_img2_scale)
-                    
-                    # 根据缩放比例调整图片大小
-                    header_img2 = header_img2.resize(width=video_width * self.header_img2_scale)
-                    
-                    # 创建图片遮罩
-                    img2_array = header_img2.get_frame(0)
-                    # 计算放置位置
-                    x_pos = int(self.header_img2_x)
-                    y_pos = int(self.header_img2_y)
-                    
-                    # 确保图片不会超出边界
-                    img_h, img_w = img2_array.shape[:2]
-                    if x_pos < 0: x_pos = 0
-                    if y_pos < 0: y_pos = 0
-                    if x_pos + img_w > video_width: img_w = video_width - x_pos
-                    if y_pos + img_h > video_height: img_h = video_height - y_pos
-                    
-                    # 将图片叠加到帧上
-                    if img_w > 0 and img_h > 0:
-                        # 重新缩放图片确保尺寸正确
-                        img2_resized = cv2.resize(img2_array, (img_w, img_h))
-                        # 仅复制非透明区域
-                        if img2_resized.shape[2] == 4:  # 如果有alpha通道
-                            alpha = img2_resized[:, :, 3] / 255.0
-                            for c in range(3):
-                                moved_frame[y_pos:y_pos+img_h, x_pos:x_pos+img_w, c] = (
-                                    moved_frame[y_pos:y_pos+img_h, x_pos:x_pos+img_w, c] * (1 - alpha) + 
-                                    img2_resized[:, :, c] * alpha
-                                )
-                        else:
-                            moved_frame[y_pos:y_pos+img_h, x_pos:x_pos+img_w] = img2_resized[:, :, :3]
-                    
-                    self.error_occurred.emit(f"加载图片2成功: {os.path.basename(self.header_img2_path)}")
-                    self.error_occurred.emit(f"图片2尺寸: 原始={header_img2.size}, 缩放比例={self.header_img2_scale}, 调整后宽度={img_w}, 位置=({x_pos}, {y_pos})")
-            except Exception as e:
-                self.error_occurred.emit(f"处理图片2时出错: {str(e)}")
+            # 准备两张头部图片和正片叠底图层（解码和缩放结果均有缓存）
+            headers = [
+                self.header_layer(1, self.header_img1_path, self.header_img1_x, self.header_img1_y,
+                                  self.header_img1_scale, video_width, video_height),
+                self.header_layer(2, self.header_img2_path, self.header_img2_x, self.header_img2_y,
+                                  self.header_img2_scale, video_width, video_height),
+            ]
+            watermark = self.watermark_layer(video_width, video_height)
+            if self.preview_cancelled():
+                return
             
-            # 使用正片叠底方式添加背景图片
-            final_frame = moved_frame.copy()
-            if self.bg_img_path and os.path.exists(self.bg_img_path):
-                try:
-                    # 加载背景图片作为静态图像
-                    bg_img_pil = Image.open(self.bg_img_path)
-                    # 调整大小
-                    new_width = int(video_width * self.bg_img_scale)
-                    new_height = int(bg_img_pil.height * new_width / bg_img_pil.width)
-                    bg_img_pil = bg_img_pil.resize((new_width, new_height))
-                    # 转换为numpy数组
-                    bg_array = np.array(bg_img_pil)
-                    
-                    # 确保背景图片有正确的通道数
-                    if len(bg_array.shape) == 2:  # 灰度图像
-                        bg_array = np.stack([bg_array, bg_array, bg_array], axis=2)
-                    elif bg_array.shape[2] == 4:  # 带透明通道
-                        # 将透明通道与RGB通道分离
-                        alpha = bg_array[:, :, 3] / 255.0
-                        bg_array = bg_array[:, :, :3]
-                    
-                    # 计算放置位置
-                    x_pos = int(self.bg_img_x)
-                    y_pos = int(self.bg_img_y)
-                    
-                    # 确保背景图片不会超出边界
-                    frame_h, frame_w = moved_frame.shape[:2]
-                    bg_h, bg_w = bg_array.shape[:2]
-                    
-                    # 裁剪背景图片确保不超出边界
-                    if x_pos < 0:
-                        bg_array = bg_array[:, -x_pos:] if -x_pos < bg_w else None
-                        bg_w = bg_array.shape[1] if bg_array is not None else 0
-                        x_pos = 0
-                    
-                    if y_pos < 0:
-                        bg_array = bg_array[-y_pos:, :] if -y_pos < bg_h else None
-                        bg_h = bg_array.shape[0] if bg_array is not None else 0
-                        y_pos = 0
-                    
-                    if x_pos + bg_w > frame_w:
-                        bg_array = bg_array[:, :frame_w-x_pos] if bg_array is not None else None
-                        bg_w = bg_array.shape[1] if bg_array is not None else 0
-                    
-                    if y_pos + bg_h > frame_h:
-                        bg_array = bg_array[:frame_h-y_pos, :] if bg_array is not None else None
-                        bg_h = bg_array.shape[0] if bg_array is not None else 0
-                    
-                    # 应用正片叠底效果
-                    if bg_array is not None and bg_w > 0 and bg_h > 0:
-                        # 1. 获取视频帧对应区域
-                        frame_region = moved_frame[y_pos:y_pos+bg_h, x_pos:x_pos+bg_w].astype(np.float32)
-                        # 2. 将背景图片转换为float进行乘法操作
-                        bg_float = bg_array.astype(np.float32)
-                        # 3. 正片叠底计算
-                        multiply_result = (frame_region * bg_float) / 255.0
-                        # 4. 混合原始帧和正片叠底结果
-                        final_region = frame_region * (1 - self.bg_img_opacity) + multiply_result * self.bg_img_opacity
-                        # 5. 将结果裁剪到0-255范围并转回uint8
-                        final_region = np.clip(final_region, 0, 255).astype(np.uint8)
-                        # 6. 将处理后的区域放回最终帧
-                        final_frame[y_pos:y_pos+bg_h, x_pos:x_pos+bg_w] = final_region
-                    
-                        self.error_occurred.emit(f"已添加背景图片(正片叠底模式): {os.path.basename(self.bg_img_path)}")
-                except Exception as e:
-                    self.error_occurred.emit(f"添加背景图片失败: {str(e)}")
-                    traceback.print_exc()
+            # 上次合成后只有头部图片位置变化时，只重新合成新旧位置的区域，否则重新合成整帧
+            contents = ([layer[0] for layer in headers], watermark[0] if watermark is not None else None)
+            rects = [layer[3:] for layer in headers]
+            if self._composed is not None and self._composed[0] == contents:
+                regions = [rect for old, new in zip(self._composed[1], rects) if old != new
+                           for rect in (old, new) if rect[2] > 0 and rect[3] > 0]
+            else:
+                regions = [(0, 0, video_width, video_height)]
             
-            # 显示预览帧
-            self.preview_frame_ready.emit(final_frame)
+            self._composed = None  # 合成过程中缓冲区内容不完整
+            for region in regions:
+                self.compose_region(region, headers, watermark)
+            self._composed = (contents, rects)
             
-            # 释放资源
-            video_clip.close()
+            # 在工作线程中缩放到预览尺寸，界面线程只需转换为QPixmap（已过时的预览不再通知界面）
+            if not self.preview_cancelled():
+                self.update_display_buffer(self.preview_buf)
+                self.preview_frame_ready.emit()
             
         except Exception as e:
             self.error_occurred.emit(f"生成预览时出错: {str(e)}")
             traceback.print_exc()
     
+    def header_layer(self, number, path, x, y, scale, video_width, video_height):
+        """准备预览用的头部图片图层
+        
+        返回 (内容键, 预乘BGR, 255-alpha, x, y, w, h)，(x, y, w, h)为限制在帧内的放置区域；
+        没有图片或出错时内容键为None、区域为空
+        """
+        empty = (None, None, None, 0, 0, 0, 0)
+        try:
+            # 每次预览对每张图片只访问一次文件系统（修改时间同时用作缓存键）
+            mtime = _file_mtime(path)
+            if mtime is None:
+                return empty
+            # 计算缩放后的宽度，保持宽高比
+            target_width = max(1, int(video_width * scale))
+            _, _, premul, inv_alpha = self._scaled_entry(path, target_width, mtime)
+            # 计算放置位置，确保图片不会超出边界（超出的部分直接裁剪，与导出结果一致）
+            img_h, img_w = premul.shape[1:]
+            x_pos, y_pos, img_w, img_h = _fit_roi(int(x), int(y), img_w, img_h, video_width, video_height)
+            
+            original_h, original_w = self._load_image(path, mtime)[0].shape[:2]
+            self.error_occurred.emit(f"加载图片{number}成功: {os.path.basename(path)}")
+            self.error_occurred.emit(f"图片{number}尺寸: 原始=[{original_w}, {original_h}], 缩放比例={scale}, 调整后宽度={img_w}, 位置=({x_pos}, {y_pos})")
+            return (path, mtime, target_width), premul, inv_alpha, x_pos, y_pos, img_w, img_h
+        except Exception as e:
+            self.error_occurred.emit(f"处理图片{number}时出错: {str(e)}")
+            return empty
+    
+    def watermark_layer(self, video_width, video_height):
+        """准备预览用的正片叠底图层，返回 (内容键, 逐像素系数, x, y)，不需要时返回None
+        
+        正片叠底和混合强度合并为一个uint16系数（已裁剪到帧内），参数不变时复用上次的结果
+        """
+        mtime = _file_mtime(self.bg_img_path)
+        if mtime is None:
+            return None
+        try:
+            key = (self.bg_img_path, mtime, self.bg_img_scale,
+                   self.bg_img_opacity, int(self.bg_img_x), int(self.bg_img_y), video_width, video_height)
+            if self._watermark is None or self._watermark[0] != key:
+                self._watermark = self.build_watermark_factor(key, video_width, video_height)
+            if self._watermark is not None:
+                self.error_occurred.emit(f"已添加背景图片(正片叠底模式): {os.path.basename(self.bg_img_path)}")
+            return self._watermark
+        except Exception as e:
+            self.error_occurred.emit(f"添加背景图片失败: {str(e)}")
+            traceback.print_exc()
+            return None
+    
+    def build_watermark_factor(self, key, video_width, video_height):
+        """加载并缩放背景图片，计算裁剪到帧内的正片叠底系数，完全超出帧时返回None"""
+        from PIL import Image
+        # 加载背景图片作为静态图像
+        bg_img_pil = Image.open(self.bg_img_path)
+        # 调整大小
+        new_width = int(video_width * self.bg_img_scale)
+        new_height = int(bg_img_pil.height * new_width / bg_img_pil.width)
+        bg_img_pil = bg_img_pil.resize((new_width, new_height))
+        # 转换为numpy数组
+        bg_array = np.array(bg_img_pil)
+        
+        # 确保背景图片有正确的通道数
+        if len(bg_array.shape) == 2:  # 灰度图像
+            bg_array = np.stack([bg_array, bg_array, bg_array], axis=2)
+        elif bg_array.shape[2] == 4:  # 带透明通道
+            bg_array = bg_array[:, :, :3]
+        # 转为与预览帧一致的BGR顺序
+        bg_array = bg_array[:, :, ::-1]
+        
+        # 计算放置位置，裁剪背景图片确保不超出边界
+        x_pos = int(self.bg_img_x)
+        y_pos = int(self.bg_img_y)
+        if x_pos < 0:
+            bg_array = bg_array[:, -x_pos:]
+            x_pos = 0
+        if y_pos < 0:
+            bg_array = bg_array[-y_pos:, :]
+            y_pos = 0
+        bg_array = bg_array[:max(0, video_height - y_pos), :max(0, video_width - x_pos)]
+        if bg_array.shape[0] == 0 or bg_array.shape[1] == 0:
+            return None
+        
+        # 帧*(1-强度) + 帧*背景/255*强度 = 帧 * (255 - k + 背景*k/255) / 255，k = 强度*255
+        k = int(round(self.bg_img_opacity * 255))
+        factor = (255 - k) + _div255(bg_array.astype(np.uint16) * k)
+        return key, factor, x_pos, y_pos
+    
+    def compose_region(self, region, headers, watermark):
+        """从下移后的帧重新合成预览缓冲区中的一个矩形区域：先混合头部图片，再正片叠底"""
+        rx, ry, rw, rh = region
+        buf = self.preview_buf
+        buf[ry:ry+rh, rx:rx+rw] = self._base_frame[ry:ry+rh, rx:rx+rw]
+        
+        for _, premul, inv_alpha, x, y, w, h in headers:
+            x0, y0 = max(x, rx), max(y, ry)
+            x1, y1 = min(x + w, rx + rw), min(y + h, ry + rh)
+            if x1 > x0 and y1 > y0:
+                _alpha_blit(buf, premul, inv_alpha, x0, y0, x1 - x0, y1 - y0, x0 - x, y0 - y)
+        
+        if watermark is not None:
+            _, factor, x, y = watermark
+            x0, y0 = max(x, rx), max(y, ry)
+            x1 = min(x + factor.shape[1], rx + rw)
+            y1 = min(y + factor.shape[0], ry + rh)
+            if x1 > x0 and y1 > y0:
+                roi = buf[y0:y1, x0:x1]
+                roi[:] = _div255(roi * factor[y0-y:y1-y, x0-x:x1-x]).astype(np.uint8)
+    
+    def update_display_buffer(self, frame, smooth=False):
+        """将BGR帧缩小到预览区域尺寸以内（保持宽高比），写入预分配的显示缓冲区
+        
+        smooth为False时使用最近邻插值（连续调整参数时的快速预览），否则使用高质量插值
+        """
+        import cv2
+        h, w = frame.shape[:2]
+        target = QSize(w, h)
+        if self.preview_size is not None:
+            target = target.scaled(QSize(*self.preview_size), Qt.KeepAspectRatio)
+        target_w, target_h = max(1, target.width()), max(1, target.height())
+        
+        if not smooth:
+            interpolation = cv2.INTER_NEAREST
+        elif target_w < w:
+            interpolation = cv2.INTER_AREA
+        else:
+            interpolation = cv2.INTER_LINEAR
+        
+        # 先缩放到3通道的中间缓冲区（只有预览线程使用，无需加锁）
+        if (target_w, target_h) != (w, h) and w * h >= _OPENCL_MIN_PIXELS and cv2.ocl.useOpenCL():
+            # 大尺寸帧用OpenCL在GPU上缩放（上传整帧，下载的只是预览尺寸的结果）
+            try:
+                scaled = cv2.resize(cv2.UMat(frame), (target_w, target_h), interpolation=interpolation).get()
+            except cv2.error as e:
+                # OpenCL运行出错时停用（update_display_buffer只在预览线程中调用，开关对本线程生效），之后都在CPU上缩放
+                cv2.ocl.setUseOpenCL(False)
+                self.error_occurred.emit(f"OpenCL缩放失败，改用CPU: {str(e)}")
+                return self.update_display_buffer(frame, smooth)
+        elif (target_w, target_h) != (w, h):
+            if self._scaled_bgr is None or self._scaled_bgr.shape[:2] != (target_h, target_w):
+                self._scaled_bgr = np.empty((target_h, target_w, 3), dtype=np.uint8)
+            cv2.resize(frame, (target_w, target_h), dst=self._scaled_bgr, interpolation=interpolation)
+            scaled = self._scaled_bgr
+        else:
+            scaled = frame
+        
+        # 再转换为4字节像素写入显示缓冲区
+        code = cv2.COLOR_BGR2BGRA if _DISPLAY_BGRA else cv2.COLOR_BGR2RGBA
+        self._display_mutex.lock()
+        try:
+            if self._display_buf is None or self._display_buf.shape[:2] != (target_h, target_w):
+                self._display_buf = np.empty((target_h, target_w, 4), dtype=np.uint8)
+            cv2.cvtColor(scaled, code, dst=self._display_buf)
+            self._display_fast = scaled is not frame and not smooth
+        finally:
+            self._display_mutex.unlock()
+    
+    def snapshot(self):
+        """返回当前显示缓冲区的QPixmap（在界面线程中调用），加锁防止读到写了一半的画面"""
+        self._display_mutex.lock()
+        try:
+            if self._display_buf is None:
+                return None
+            buf = self._display_buf
+            h, w = buf.shape[:2]
+            q_img = QImage(buf.data, w, h, buf.strides[0], _DISPLAY_QIMAGE_FORMAT)
+            # fromImage会复制像素，返回后QPixmap不再引用显示缓冲区
+            return QPixmap.fromImage(q_img)
+        finally:
+            self._display_mutex.unlock()
+    
     def process_videos(self):
-        """处理所有视频"""
+        """处理所有视频（多个视频并行编码）"""
         try:
             if not self.video_files:
                 self.error_occurred.emit("没有选择视频文件")
@@ -315,102 +896,95 @@ class VideoProcessor(QThread):
                 return
             
             total_files = len(self.video_files)
+            temp_dir = tempfile.mkdtemp(prefix="englishvideo_")
+            layers = {}  # 视频尺寸 -> 预先生成的图层，同尺寸视频共用
             
-            for idx, video_path in enumerate(self.video_files):
-                if self.stopped():
-                    self.error_occurred.emit("用户中断处理")
-                    return
-                
-                try:
-                    # 更新进度
-                    progress = int((idx / total_files) * 100)
-                    self.progress_updated.emit(progress)
-                    
-                    # 发送状态信息
-                    self.error_occurred.emit(f"处理视频 {idx+1}/{total_files}: {os.path.basename(video_path)}")
-                    
-                    # 使用moviepy打开视频
-                    video_clip = VideoFileClip(video_path)
-                    
-                    # 获取视频尺寸
-                    video_width, video_height = video_clip.size
-                    self.error_occurred.emit(f"视频尺寸: {video_clip.size}")
-                    
-                    # 创建背景
-                    background = ColorClip(size=(video_width, video_height), color=(0, 0, 0))
-                    background = background.set_duration(video_clip.duration)
-                    
-                    # 将原始视频下移
-                    offset = min(self.offset, video_height - 10)  # 确保至少有一部分视频可见
-                    moved_clip = video_clip.set_position((0, offset))
-                    
-                    # 创建合成视频剪辑列表
-                    clips = [background, moved_clip]
+            # 并行数：每个FFmpeg进程分到的线程数较少时效率更高；硬件编码器的并发会话数有限
+            cpu_count = os.cpu_count() or 1
+            workers = min(total_files, max(1, cpu_count // 2))
+            if self.encoder != "libx264":
+                workers = min(workers, 2)
+            threads = max(1, cpu_count // workers)
+            
+            try:
+                # 先为每个视频准备好FFmpeg命令
+                jobs = []
+                used_outputs = set()
+                for idx, video_path in enumerate(self.video_files):
+                    if self.stopped():
+                        self.error_occurred.emit("用户中断处理")
+                        return
                     
-                    # 添加第一张头部图片
                     try:
-                        if self.header_img1_path and os.path.exists(self.header_img1_path):
-                            header_img1 = ImageClip(self.header_img1_path)
-                            # 根据缩放比例调整图片大小
-                            header_img1 = header_img1.resize(width=video_width * self.header_img1_scale)
-                            # 设置位置和持续时间
-                            header_img1 = header_img1.set_position((self.header_img1_x, self.header_img1_y))
-                            header_img1 = header_img1.set_duration(video_clip.duration)
-                            clips.append(header_img1)
-                            
-                            self.error_occurred.emit(f"添加图片1: 缩放比例={self.header_img1_scale}, 位置=({self.header_img1_x}, {self.header_img1_y})")
-                    except Exception as e:
-                        self.error_occurred.emit(f"添加图片1时出错: {str(e)}")
+                        # 发送状态信息
+                        self.error_occurred.emit(f"处理视频 {idx+1}/{total_files}: {os.path.basename(video_path)}")
+                        
+                        # 获取视频尺寸
+                        video_width, video_height, duration = _probe_video(video_path)
+                        self.error_occurred.emit(f"视频尺寸: [{video_width}, {video_height}]")
+                        
+                        # 生成输出文件名
+                        base_name = os.path.basename(video_path)
+                        name, ext = os.path.splitext(base_name)
+                        output_file = os.path.join(self.output_dir, f"{name}_processed{ext}")
+                        # 不同文件夹中的同名视频会得到相同的输出路径，并行编码时会同时写入一个文件，依次加序号区分
+                        suffix = 0
+                        while os.path.normcase(output_file) in used_outputs:
+                            suffix += 1
+                            output_file = os.path.join(self.output_dir, f"{name}_processed_{suffix}{ext}")
+                        if suffix:
+                            self.error_occurred.emit(f"输出文件重名，改为: {os.path.basename(output_file)}")
+                        used_outputs.add(os.path.normcase(output_file))
+                        
+                        # 构建FFmpeg命令，下移、叠加图片和正片叠底全部在FFmpeg滤镜图中完成
+                        if (video_width, video_height) not in layers:
+                            layers[(video_width, video_height)] = self.build_layers(video_width, video_height, temp_dir)
+                        command = self.build_ffmpeg_command(video_path, output_file, video_width, video_height,
+                                                            layers[(video_width, video_height)], threads)
+                        jobs.append((video_path, output_file, command, duration))
                     
-                    # 添加第二张头部图片
-                    try:
-                        if self.header_img2_path and os.path.exists(self.header_img2_path):
-                            header_img2 = ImageClip(self.header_img2_path)
-                            # 根据缩放比例调整图片大小
-                            header_img2 = header_img2.resize(width=video_width * self.header_img2_scale)
-                            # 设置位置和持续时间
-                            header_img2 = header_img2.set_position((self.header_img2_x, self.header_img2_y))
-                            header_img2 = header_img2.set_duration(video_clip.duration)
-                            clips.append(header_img2)
-                            
-                            self.error_occurred.emit(f"添加图片2: 缩放比例={self.header_img2_scale}, 位置=({self.header_img2_x}, {self.header_img2_y})")
                     except Exception as e:
-                        self.error_occurred.emit(f"添加图片2时出错: {str(e)}")
-                    
-                    # 合成最终视频
-                    final_clip = CompositeVideoClip(clips, size=video_clip.size)
-                    
-                    # 使用正片叠底方式添加背景图片
-                    final_clip = final_clip.fl(lambda gf, t: self.process_background(gf(t)))
-                    
-                    # 生成输出文件名
-                    base_name = os.path.basename(video_path)
-                    name, ext = os.path.splitext(base_name)
-                    output_file = os.path.join(self.output_dir, f"{name}_processed{ext}")
-                    
-                    # 写入视频文件
-                    self.error_occurred.emit(f"正在写入: {os.path.basename(output_file)}")
-                    final_clip.write_videofile(
-                        output_file,
-                        codec='libx264',
-                        audio_codec='aac',
-                        temp_audiofile=os.path.join(self.output_dir, "temp-audio.m4a"),
-                        remove_temp=True,
-                        fps=video_clip.fps,
-                        threads=4,
-                        preset='medium',
-                        logger=None  # 禁用moviepy的进度条
-                    )
+                        self.error_occurred.emit(f"处理 {os.path.basename(video_path)} 时出错: {str(e)}")
+                        traceback.print_exc()
+                
+                # 汇总进度：各视频的完成比例由编码线程实时更新，准备阶段失败的视频按已完成计
+                skipped = total_files - len(jobs)
+                fractions = [0.0] * len(jobs)
+                progress_lock = threading.Lock()
+                last_percent = [-1]
+                
+                def report_progress(index, fraction):
+                    with progress_lock:
+                        fractions[index] = fraction
+                        percent = int((skipped + sum(fractions)) * 100 / total_files)
+                        if percent != last_percent[0]:
+                            last_percent[0] = percent
+                            self.progress_updated.emit(percent)
+                
+                # 并行编码
+                self.error_occurred.emit(f"并行编码: 同时处理 {workers} 个视频，每个视频 {threads} 个线程")
+                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {}
+                    for index, (video_path, output_file, command, duration) in enumerate(jobs):
+                        future = executor.submit(_encode_one, command, self._stop_event, duration,
+                                                 functools.partial(report_progress, index))
+                        futures[future] = (index, video_path, output_file)
+                        self.error_occurred.emit(f"正在写入: {os.path.basename(output_file)}")
                     
-                    # 释放资源
-                    video_clip.close()
-                    final_clip.close()
+                    for future in concurrent.futures.as_completed(futures):
+                        index, video_path, output_file = futures[future]
+                        report_progress(index, 1.0)
+                        try:
+                            if future.result():
+                                self.error_occurred.emit(f"视频处理完成: {os.path.basename(output_file)}")
+                        except Exception as e:
+                            self.error_occurred.emit(f"处理 {os.path.basename(video_path)} 时出错: {str(e)}")
                     
-                    self.error_occurred.emit(f"视频处理完成: {os.path.basename(output_file)}")
-                
-                except Exception as e:
-                    self.error_occurred.emit(f"处理 {os.path.basename(video_path)} 时出错: {str(e)}")
-                    traceback.print_exc()
+                    if self.stopped():
+                        self.error_occurred.emit("用户中断处理")
+                        return
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
             
             # 更新最终进度
             self.progress_updated.emit(100)
@@ -419,81 +993,146 @@ class VideoProcessor(QThread):
         except Exception as e:
             self.error_occurred.emit(f"批处理视频时出错: {str(e)}")
             traceback.print_exc()
-
-    def process_background(self, frame):
-        """处理背景"""
-        # 使用正片叠底方式添加背景图片
+    
+    def build_layers(self, video_width, video_height, temp_dir):
+        """为指定视频尺寸生成叠加图层文件
+        
+        返回 (头部图片图层, 正片叠底图层路径)，头部图片图层为 (路径, x, y)，不需要的图层为None
+        """
+        from PIL import Image
+        header_layer = None
+        header_overlay = self.build_header_overlay(video_width, video_height)
+        if header_overlay is not None:
+            overlay_rgba, overlay_x, overlay_y = header_overlay
+            overlay_path = os.path.join(temp_dir, f"header_{video_width}x{video_height}.png")
+            Image.fromarray(overlay_rgba, "RGBA").save(overlay_path)
+            header_layer = (overlay_path, overlay_x, overlay_y)
+        
+        bg_layer = None
         if self.bg_img_path and os.path.exists(self.bg_img_path):
             try:
-                # 加载背景图片作为静态图像
-                bg_img_pil = Image.open(self.bg_img_path)
-                # 调整大小
-                new_width = int(frame.shape[1] * self.bg_img_scale)
-                new_height = int(bg_img_pil.height * new_width / bg_img_pil.width)
-                bg_img_pil = bg_img_pil.resize((new_width, new_height))
-                # 转换为numpy数组
-                bg_array = np.array(bg_img_pil)
-                
-                # 确保背景图片有正确的通道数
-                if len(bg_array.shape) == 2:  # 灰度图像
-                    bg_array = np.stack([bg_array, bg_array, bg_array], axis=2)
-                elif bg_array.shape[2] == 4:  # 带透明通道
-                    # 将透明通道与RGB通道分离
-                    alpha = bg_array[:, :, 3] / 255.0
-                    bg_array = bg_array[:, :, :3]
-                
-                # 计算放置位置
-                x_pos = int(self.bg_img_x)
-                y_pos = int(self.bg_img_y)
-                
-                # 确保背景图片不会超出边界
-                frame_h, frame_w = frame.shape[:2]
-                bg_h, bg_w = bg_array.shape[:2]
-                
-                # 裁剪背景图片确保不超出边界
-                if x_pos < 0:
-                    bg_array = bg_array[:, -x_pos:] if -x_pos < bg_w else None
-                    bg_w = bg_array.shape[1] if bg_array is not None else 0
-                    x_pos = 0
-                
-                if y_pos < 0:
-                    bg_array = bg_array[-y_pos:, :] if -y_pos < bg_h else None
-                    bg_h = bg_array.shape[0] if bg_array is not None else 0
-                    y_pos = 0
-                
-                if x_pos + bg_w > frame_w:
-                    bg_array = bg_array[:, :frame_w-x_pos] if bg_array is not None else None
-                    bg_w = bg_array.shape[1] if bg_array is not None else 0
-                
-                if y_pos + bg_h > frame_h:
-                    bg_array = bg_array[:frame_h-y_pos, :] if bg_array is not None else None
-                    bg_h = bg_array.shape[0] if bg_array is not None else 0
-                
-                # 应用正片叠底效果
-                if bg_array is not None and bg_w > 0 and bg_h > 0:
-                    # 1. 获取视频帧对应区域
-                    frame_region = frame[y_pos:y_pos+bg_h, x_pos:x_pos+bg_w].astype(np.float32)
-                    # 2. 将背景图片转换为float进行乘法操作
-                    bg_float = bg_array.astype(np.float32)
-                    # 3. 正片叠底计算
-                    multiply_result = (frame_region * bg_float) / 255.0
-                    # 4. 混合原始帧和正片叠底结果
-                    final_region = frame_region * (1 - self.bg_img_opacity) + multiply_result * self.bg_img_opacity
-                    # 5. 将结果裁剪到0-255范围并转回uint8
-                    final_region = np.clip(final_region, 0, 255).astype(np.uint8)
-                    # 6. 将处理后的区域放回最终帧
-                    frame[y_pos:y_pos+bg_h, x_pos:x_pos+bg_w] = final_region
-                
-                    self.error_occurred.emit(f"已添加背景图片(正片叠底模式): {os.path.basename(self.bg_img_path)}")
+                bg_layer = os.path.join(temp_dir, f"bg_{video_width}x{video_height}.png")
+                self.build_background_layer(video_width, video_height, bg_layer)
+                self.error_occurred.emit(f"已添加背景图片(正片叠底模式): {os.path.basename(self.bg_img_path)}")
             except Exception as e:
+                bg_layer = None
                 self.error_occurred.emit(f"添加背景图片失败: {str(e)}")
                 traceback.print_exc()
-        return frame
+        
+        return header_layer, bg_layer
+    
+    def build_ffmpeg_command(self, video_path, output_file, video_width, video_height, layers, threads=4):
+        """构建单个视频的FFmpeg命令（filter_complex）
+        
+        layers为build_layers的返回值，threads为该视频编码和滤镜使用的线程数
+        """
+        inputs = [video_path]
+        
+        # 将原始视频下移：裁掉底部后在顶部填充黑边
+        offset = min(self.offset, video_height - 10)  # 确保至少有一部分视频可见
+        filters = [f"[0:v]crop={video_width}:{video_height - offset}:0:0,pad={video_width}:{video_height}:0:{offset}:black[v0]"]
+        last = "v0"
+        
+        header_layer, bg_layer = layers
+        
+        # 两张头部图片预先合成为一张RGBA图片，每帧只需一次overlay
+        if header_layer is not None:
+            overlay_path, overlay_x, overlay_y = header_layer
+            input_index = len(inputs)
+            inputs.append(overlay_path)
+            filters.append(f"[{last}][{input_index}:v]overlay={overlay_x}:{overlay_y}[vh]")
+            last = "vh"
+        
+        # 使用正片叠底方式添加背景图片（在RGB平面上做multiply混合）
+        if bg_layer is not None:
+            input_index = len(inputs)
+            inputs.append(bg_layer)
+            filters.append(f"[{last}]format=gbrp[vm]")
+            filters.append(f"[{input_index}:v]format=gbrp[bg]")
+            filters.append(f"[vm][bg]blend=all_mode=multiply:all_opacity={self.bg_img_opacity}[vb]")
+            last = "vb"
+        
+        # 按编码器要求转换像素格式（VAAPI还需上传到GPU）
+        global_args, output_filter, codec_args = _encoder_args(self.encoder, threads)
+        filters.append(f"[{last}]{output_filter}[vout]")
+        
+        # 解码、滤镜、编码在FFmpeg内部各自多线程流水执行（解码线程数默认自动）
+        input_args = []
+        for path in inputs:
+            input_args += ["-i", path]
+        
+        return [
+            _ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+            *global_args,
+            *input_args,
+            "-filter_complex", ";".join(filters),
+            "-filter_complex_threads", str(threads),
+            "-map", "[vout]", "-map", "0:a?",
+            *codec_args,
+            "-c:a", "aac",
+            "-progress", "pipe:1", "-nostats",
+            output_file,
+        ]
+    
+    def build_header_overlay(self, video_width, video_height):
+        """将两张头部图片合成到一张透明画布上
+        
+        画布只覆盖两张图片的外接矩形，返回 (RGBA数组, x, y)，没有图片时返回None
+        """
+        headers = []
+        for number, path, x, y, scale in (
+            (1, self.header_img1_path, self.header_img1_x, self.header_img1_y, self.header_img1_scale),
+            (2, self.header_img2_path, self.header_img2_x, self.header_img2_y, self.header_img2_scale),
+        ):
+            if not (path and os.path.exists(path)):
+                continue
+            try:
+                # 根据缩放比例调整图片大小，保持宽高比
+                target_width = max(1, int(video_width * scale))
+                img_array = self._scaled_rgba(path, target_width)
+                x_pos, y_pos = int(x), int(y)
+                if x_pos < video_width and y_pos < video_height:
+                    headers.append((img_array, x_pos, y_pos))
+                self.error_occurred.emit(f"添加图片{number}: 缩放比例={scale}, 位置=({x}, {y})")
+            except Exception as e:
+                self.error_occurred.emit(f"添加图片{number}时出错: {str(e)}")
+        
+        if not headers:
+            return None
+        
+        # 计算外接矩形（裁剪到视频范围内）
+        left = min(x_pos for _, x_pos, _ in headers)
+        top = min(y_pos for _, _, y_pos in headers)
+        right = min(video_width, max(x_pos + img.shape[1] for img, x_pos, _ in headers))
+        bottom = min(video_height, max(y_pos + img.shape[0] for img, _, y_pos in headers))
+        
+        overlay_rgba = np.zeros((bottom - top, right - left, 4), dtype=np.uint8)
+        for img_array, x_pos, y_pos in headers:
+            _alpha_over(overlay_rgba, img_array, x_pos - left, y_pos - top)
+        return overlay_rgba, left, top
+    
+    def build_background_layer(self, video_width, video_height, layer_path):
+        """生成与视频同尺寸的正片叠底图层（白色底，白色区域相乘后不改变画面）"""
+        from PIL import Image
+        bg_img_pil = Image.open(self.bg_img_path).convert("RGB")
+        # 调整大小
+        new_width = int(video_width * self.bg_img_scale)
+        new_height = int(bg_img_pil.height * new_width / bg_img_pil.width)
+        bg_img_pil = bg_img_pil.resize((new_width, new_height))
+        # 贴到白色画布上，超出边界的部分自动裁剪
+        layer = Image.new("RGB", (video_width, video_height), (255, 255, 255))
+        layer.paste(bg_img_pil, (int(self.bg_img_x), int(self.bg_img_y)))
+        layer.save(layer_path)
 
 
 class VideoEditorApp(QMainWindow):
     """视频编辑器应用主窗口"""
     
+    # 后台初始化线程发出的日志消息（排队到界面线程显示）
+    startup_info = pyqtSignal(str)
+    # 后台检测出的可用编码器列表
+    encoders_detected = pyqtSignal(list)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("英语视频编辑器")
@@ -504,15 +1143,80 @@ class VideoEditorApp(QMainWindow):
         self.header_img1_path = "E:\\Onedrive\\KMS\\10-英语音频\\赵老师做好的\\01-图片\\剪映的标题back.png"
         self.header_img2_path = "E:\\Onedrive\\KMS\\10-英语音频\\赵老师做好的\\01-图片\\真的只是标题1.png"
         self.bg_img_path = "E:\\Onedrive\\KMS\\10-英语音频\\赵老师做好的\\01-图片\\背景图片.png"
+        # 图片路径已确认存在的标记（由_validate_inputs和选择图片时更新）
+        self._img1_ok = False
+        self._img2_ok = False
+        self._bg_img_ok = False
         self.output_dir = None
         self.processor = None
         self.preview_image = None
         
+        # 预览防抖定时器：参数连续变化时，只在最后一次变化120ms后生成一次预览
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(120)
+        self._preview_timer.timeout.connect(self._do_update_preview)
+        
+        # 日志批量刷新定时器：消息先缓存，每100ms合并为一次追加，避免频繁重排和重绘日志控件
+        self._log_buf = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(100)
+        self._log_timer.timeout.connect(self._flush_log)
+        
+        # 在后台线程中配置OpenCV并预热numba混合内核，不阻塞窗口启动
+        # （非守护线程，关闭窗口时等待其结束，避免解释器退出时仍在编译或调用内核）
+        self.startup_info.connect(self.log)
+        self._warm_up_thread = threading.Thread(target=self._warm_up)
+        self._warm_up_thread.start()
+        
+        # 在后台线程中试编码检测可用的硬件编码器，检测完成前导出使用CPU x264
+        self.encoders_detected.connect(self._set_encoders)
+        threading.Thread(target=self._detect_encoders, daemon=True).start()
+        
         # 应用Mac风格
         self.apply_mac_style()
         
         # 初始化UI
         self.init_ui()
+        
+        # 常驻的预览线程：只创建一次，之后通过submit_params提交预览请求
+        self.preview_processor = VideoProcessor([], 0, preview_only=True)
+        self.preview_processor.preview_frame_ready.connect(self.update_preview_image)
+        self.preview_processor.preview_refined.connect(self.show_preview_pixmap)
+        self.preview_processor.error_occurred.connect(self.log)
+        self.preview_processor.start()
+    
+    def _warm_up(self):
+        """后台初始化：配置OpenCV线程和优化选项、预热混合内核"""
+        try:
+            self.startup_info.emit(_configure_opencv())
+            message = _warm_up_blend_kernel()
+            if message:
+                self.startup_info.emit(message)
+        except Exception as e:
+            self.startup_info.emit(f"初始化加速组件失败: {str(e)}")
+    
+    def _detect_encoders(self):
+        """后台检测可用的编码器（每个硬件编码器实际编码一帧）"""
+        self.encoders_detected.emit(_usable_video_encoders())
+    
+    def _set_encoders(self, available_encoders):
+        """按检测结果填充编码器下拉框，并在日志中显示
+        
+        默认仍使用CPU x264（按画质恒定编码），硬件编码器的码率控制方式不同，只在用户选择时使用
+        """
+        self.encoder_combo.clear()
+        hardware = []
+        for label, encoder in VIDEO_ENCODERS:
+            if encoder in available_encoders:
+                self.encoder_combo.addItem(label, encoder)
+                if encoder != "libx264":
+                    hardware.append(label)
+        if hardware:
+            self.log(f"检测到可用的硬件编码器: {', '.join(hardware)}，可在\"编码器\"中选择以加快导出（默认仍使用CPU x264）")
+        else:
+            self.log("未检测到可用的硬件编码器，导出使用CPU x264")
     
     def apply_mac_style(self):
         """应用Mac风格样式"""
@@ -718,6 +1422,15 @@ class VideoEditorApp(QMainWindow):
         
         layout.addLayout(offset_layout)
         
+        # 编码器选择（启动时先只有CPU x264，后台检测出可用的硬件编码器后再加入）
+        encoder_layout = QHBoxLayout()
+        encoder_layout.addWidget(QLabel("编码器:"))
+        self.encoder_combo = QComboBox()
+        self.encoder_combo.addItem(*VIDEO_ENCODERS[0])
+        encoder_layout.addWidget(self.encoder_combo)
+        
+        layout.addLayout(encoder_layout)
+        
         parent_layout.addWidget(group_box)
     
     def create_image_settings_group(self, parent_layout):
@@ -923,6 +1636,7 @@ class VideoEditorApp(QMainWindow):
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
         self.log_text.setMinimumHeight(150)
+        self._log_scrollbar = self.log_text.verticalScrollBar()
         
         layout.addWidget(self.log_text)
         
@@ -969,17 +1683,42 @@ class VideoEditorApp(QMainWindow):
         if file_path:
             if img_number == 1:
                 self.header_img1_path = file_path
+                self._img1_ok = True
                 self.img1_path_label.setText(os.path.basename(file_path))
             elif img_number == 2:
                 self.header_img2_path = file_path
+                self._img2_ok = True
                 self.img2_path_label.setText(os.path.basename(file_path))
             elif img_number == 3:
                 self.bg_img_path = file_path
+                self._bg_img_ok = True
                 self.bg_img_path_label.setText(os.path.basename(file_path))
             
             self.log(f"已选择图片{img_number}: {file_path}")
             self.update_preview()
     
+    def _validate_inputs(self):
+        """检查图片是否存在，缓存检查结果（通过文件对话框选择的图片视为存在，只有未确认的路径才访问文件系统）"""
+        if self.header_img1_path and not self._img1_ok:
+            self._img1_ok = os.path.exists(self.header_img1_path)
+            if not self._img1_ok:
+                QMessageBox.warning(self, "警告", f"图片1不存在: {self.header_img1_path}")
+                return False
+        
+        if self.header_img2_path and not self._img2_ok:
+            self._img2_ok = os.path.exists(self.header_img2_path)
+            if not self._img2_ok:
+                QMessageBox.warning(self, "警告", f"图片2不存在: {self.header_img2_path}")
+                return False
+        
+        if self.bg_img_path and not self._bg_img_ok:
+            self._bg_img_ok = os.path.exists(self.bg_img_path)
+            if not self._bg_img_ok:
+                QMessageBox.warning(self, "警告", f"背景图片不存在: {self.bg_img_path}")
+                return False
+        
+        return True
+    
     def generate_preview(self):
         """生成预览"""
         if not self.video_files:
@@ -987,91 +1726,63 @@ class VideoEditorApp(QMainWindow):
             return
         
         # 检查图片是否存在
-        if self.header_img1_path and not os.path.exists(self.header_img1_path):
-            QMessageBox.warning(self, "警告", f"图片1不存在: {self.header_img1_path}")
-            return
-        
-        if self.header_img2_path and not os.path.exists(self.header_img2_path):
-            QMessageBox.warning(self, "警告", f"图片2不存在: {self.header_img2_path}")
-            return
-        
-        if self.bg_img_path and not os.path.exists(self.bg_img_path):
-            QMessageBox.warning(self, "警告", f"背景图片不存在: {self.bg_img_path}")
+        if not self._validate_inputs():
             return
         
         # 清空预览
         self.preview_label.setText("正在生成预览...")
         self.preview_image = None
         
-        # 创建并启动处理线程
-        self.processor = VideoProcessor(
-            self.video_files, 
-            self.offset_spin.value(),
-            self.header_img1_path, 
-            self.img1_x_spin.value(), 
-            self.img1_y_spin.value(),
-            self.img1_scale_spin.value(),
-            self.header_img2_path, 
-            self.img2_x_spin.value(), 
-            self.img2_y_spin.value(),
-            self.img2_scale_spin.value(),
-            self.bg_img_path,
-            self.bg_img_x_spin.value(),
-            self.bg_img_y_spin.value(),
-            self.bg_img_scale_spin.value(),
-            self.bg_img_opacity_spin.value(),
-            preview_only=True
-        )
-        
-        # 连接信号
-        self.processor.preview_frame_ready.connect(self.update_preview_image)
-        self.processor.error_occurred.connect(self.log)
-        
-        # 启动线程
-        self.processor.start()
+        # 提交给常驻的预览线程（正在生成的过时预览会尽快放弃）
+        self.preview_processor.submit_params({
+            "video_files": list(self.video_files),
+            "offset": self.offset_spin.value(),
+            "header_img1_path": self.header_img1_path,
+            "header_img1_x": self.img1_x_spin.value(),
+            "header_img1_y": self.img1_y_spin.value(),
+            "header_img1_scale": self.img1_scale_spin.value(),
+            "header_img2_path": self.header_img2_path,
+            "header_img2_x": self.img2_x_spin.value(),
+            "header_img2_y": self.img2_y_spin.value(),
+            "header_img2_scale": self.img2_scale_spin.value(),
+            "bg_img_path": self.bg_img_path,
+            "bg_img_x": self.bg_img_x_spin.value(),
+            "bg_img_y": self.bg_img_y_spin.value(),
+            "bg_img_scale": self.bg_img_scale_spin.value(),
+            "bg_img_opacity": self.bg_img_opacity_spin.value(),
+            "preview_size": (self.preview_label.width(), self.preview_label.height()),
+        })
         
         self.log("正在生成预览...")
     
     def update_preview(self):
-        """更新预览（用于参数变更时）"""
-        if hasattr(self, 'processor') and self.processor and self.processor.isRunning():
-            # 如果处理器正在运行，先停止它
-            self.processor.stop()
-            self.processor.wait()
-        
-        # 重新生成预览
+        """更新预览（用于参数变更时），重新计时以合并连续的参数变化"""
+        self._preview_timer.start()
+    
+    def _do_update_preview(self):
+        """防抖定时器到期后实际更新预览"""
         if self.video_files:
             self.generate_preview()
     
-    def update_preview_image(self, frame):
-        """更新预览图像"""
-        # 将OpenCV格式的帧转换为QImage
-        h, w, c = frame.shape
-        bytes_per_line = 3 * w
-        
-        # 将BGR转换为RGB（OpenCV使用BGR，Qt使用RGB）
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # 创建QImage
-        q_img = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        
-        # 缩放图像以适应预览区域
-        pixmap = QPixmap.fromImage(q_img)
-        preview_size = self.preview_label.size()
-        scaled_pixmap = pixmap.scaled(
-            preview_size, 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        
-        # 更新预览标签
-        self.preview_label.setPixmap(scaled_pixmap)
+    def update_preview_image(self):
+        """更新预览图像（图像已在预览线程中缩放到预览区域尺寸）"""
+        if not self.show_preview_pixmap():
+            return
         
         # 保存预览图像
-        self.preview_image = frame
+        self.preview_image = self.preview_processor.preview_buf
         
         self.log("预览已更新")
     
+    def show_preview_pixmap(self):
+        """将预览线程显示缓冲区中的图像显示到预览标签，没有图像时返回False"""
+        pixmap = self.preview_processor.snapshot()
+        if pixmap is None:
+            return False
+        # 像素已是最终尺寸，无需再缩放
+        self.preview_label.setPixmap(pixmap)
+        return True
+    
     def export_videos(self):
         """导出视频"""
         if not self.video_files:
@@ -1083,16 +1794,7 @@ class VideoEditorApp(QMainWindow):
             return
         
         # 检查图片是否存在
-        if self.header_img1_path and not os.path.exists(self.header_img1_path):
-            QMessageBox.warning(self, "警告", f"图片1不存在: {self.header_img1_path}")
-            return
-        
-        if self.header_img2_path and not os.path.exists(self.header_img2_path):
-            QMessageBox.warning(self, "警告", f"图片2不存在: {self.header_img2_path}")
-            return
-        
-        if self.bg_img_path and not os.path.exists(self.bg_img_path):
-            QMessageBox.warning(self, "警告", f"背景图片不存在: {self.bg_img_path}")
+        if not self._validate_inputs():
             return
         
         # 设置按钮和进度条状态
@@ -1117,7 +1819,8 @@ class VideoEditorApp(QMainWindow):
             self.bg_img_scale_spin.value(),
             self.bg_img_opacity_spin.value(),
             preview_only=False,
-            output_dir=self.output_dir
+            output_dir=self.output_dir,
+            encoder=self.encoder_combo.currentData()
         )
         
         # 连接信号
@@ -1128,7 +1831,7 @@ class VideoEditorApp(QMainWindow):
         # 启动线程
         self.processor.start()
         
-        self.log(f"开始处理 {len(self.video_files)} 个视频...")
+        self.log(f"开始处理 {len(self.video_files)} 个视频（编码器: {self.encoder_combo.currentText()}）...")
     
     def on_processing_finished(self, message):
         """处理完成时的回调"""
@@ -1138,16 +1841,31 @@ class VideoEditorApp(QMainWindow):
     
     def log(self, message):
         """显示日志消息"""
-        timestamp = QDateTime.currentDateTime().toString("hh:mm:ss")
+        timestamp = time.strftime("%H:%M:%S")
         formatted_message = f"[{timestamp}] {message}"
-        self.log_text.append(formatted_message)
-        # 滚动到底部
-        self.log_text.verticalScrollBar().setValue(
-            self.log_text.verticalScrollBar().maximum()
-        )
+        # 缓存消息，由定时器统一追加到日志控件
+        self._log_buf.append(formatted_message)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
         # 同时打印到控制台
         print(formatted_message)
     
+    def _flush_log(self):
+        """将缓存的日志消息一次性追加到日志控件"""
+        if not self._log_buf:
+            return
+        joined = "\n".join(self._log_buf)
+        self._log_buf.clear()
+        self.log_text.setUpdatesEnabled(False)
+        try:
+            self.log_text.append(joined)
+            # 滚动到底部（已在底部时跳过）
+            scrollbar = self._log_scrollbar
+            if scrollbar.value() != scrollbar.maximum():
+                scrollbar.setValue(scrollbar.maximum())
+        finally:
+            self.log_text.setUpdatesEnabled(True)
+    
     def closeEvent(self, event):
         """窗口关闭事件"""
         if hasattr(self, 'processor') and self.processor and self.processor.isRunning():
@@ -1159,15 +1877,19 @@ class VideoEditorApp(QMainWindow):
                 QMessageBox.No
             )
             
-            if reply == QMessageBox.Yes:
-                # 停止处理线程
-                self.processor.stop()
-                self.processor.wait()
-                event.accept()
-            else:
+            if reply != QMessageBox.Yes:
                 event.ignore()
-        else:
-            event.accept()
+                return
+            
+            # 停止处理线程
+            self.processor.stop()
+            self.processor.wait()
+        
+        # 退出常驻的预览线程，并等待后台初始化完成
+        self.preview_processor.stop()
+        self.preview_processor.wait()
+        self._warm_up_thread.join()
+        event.accept()
 
 
 if __name__ == "__main__":